@@ -4,15 +4,23 @@ from __future__ import annotations
 
 import io
 import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
 import json
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import streamlit as st
 from st_aggrid import AgGrid, GridOptionsBuilder
 
@@ -27,77 +35,323 @@ class S3Layout:
     file_format: str  # parquet only
 
 
+@st.cache_resource(show_spinner=False)
 def get_boto3_client(profile: Optional[str]):
+    # One client per profile for the server lifetime; reruns reuse the warm
+    # connection pool instead of redoing credential/endpoint resolution.
+    config = Config(
+        max_pool_connections=32,
+        retries={"max_attempts": 10, "mode": "adaptive"},
+        tcp_keepalive=True,
+    )
     try:
         session = boto3.Session(profile_name=profile) if profile else boto3.Session()
-        return session.client("s3")
+        return session.client("s3", config=config)
     except Exception as exc:  # boto3 raises various errors for profile issues
         raise RuntimeError(f"Unable to create boto3 client (profile={profile}): {exc}")
 
 
-def load_dataset(client, layout: S3Layout):
+# Ranged-GET fan-out for the master download; a single S3 stream tops out well
+# below what 8 parallel ranges achieve.
+_RANGE_CHUNK = 8 << 20
+_RANGE_WORKERS = 8
+
+
+def _download_object(client, bucket: str, key: str, version_id: Optional[str]) -> bytes:
+    base_kwargs = {"Bucket": bucket, "Key": key}
+    if version_id:
+        base_kwargs["VersionId"] = version_id
     try:
-        obj = client.get_object(Bucket=layout.bucket, Key=layout.master_key)
+        head = client.head_object(**base_kwargs)
+    except ClientError as exc:
+        raise RuntimeError(f"Failed to load {key} from S3: {exc}")
+
+    size = head["ContentLength"]
+    # Pin the generation reported by head so all ranges read the same object.
+    if not version_id and head.get("VersionId"):
+        base_kwargs["VersionId"] = head["VersionId"]
+
+    try:
+        if size <= _RANGE_CHUNK:
+            return client.get_object(**base_kwargs)["Body"].read()
+
+        buf = bytearray(size)
+
+        def fetch_range(start: int):
+            end = min(start + _RANGE_CHUNK, size) - 1
+            body = client.get_object(**base_kwargs, Range=f"bytes={start}-{end}")["Body"].read()
+            buf[start : start + len(body)] = body
+
+        with ThreadPoolExecutor(max_workers=_RANGE_WORKERS) as pool:
+            list(pool.map(fetch_range, range(0, size, _RANGE_CHUNK)))
+        return bytes(buf)
     except ClientError as exc:
-        raise RuntimeError(f"Failed to load {layout.master_key} from S3: {exc}")
+        raise RuntimeError(f"Failed to load {key} from S3: {exc}")
+
 
-    version_id = obj.get("VersionId")
-    raw = obj["Body"].read()
+def _get_table(client, bucket: str, key: str, version_id: Optional[str]) -> pa.Table:
+    raw = _download_object(client, bucket, key, version_id)
 
     try:
-        df = pd.read_parquet(io.BytesIO(raw))
+        # BufferReader gives pyarrow a zero-copy view of the downloaded bytes.
+        table = pq.read_table(pa.BufferReader(pa.py_buffer(raw)), use_threads=True)
     except Exception as exc:
         raise RuntimeError(
             "Failed to parse dataset as Parquet. Ensure the master key points to a single Parquet object."
         ) from exc
 
-    _validate_dataset(df)
-    return df, version_id
+    _validate_table(table)
+    return table
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _fetch_table(_client, bucket: str, key: str, version_id: str, file_format: str) -> pa.Table:
+    # Cached per (bucket, key, version_id); the client is excluded from the key.
+    return _get_table(_client, bucket, key, version_id)
+
+
+# Small LRU of decoded tables keyed by VersionId. Unlike the st.cache_data
+# wrapper above it can be seeded by save_dataset, so the common
+# "save, then reload to double-check" loop never touches S3.
+_TABLE_CACHE_ENTRIES = 4
+
+
+@st.cache_resource(show_spinner=False)
+def _table_cache() -> OrderedDict:
+    return OrderedDict()
+
 
+def _remember_table(version_id: Optional[str], table: pa.Table):
+    if not version_id:
+        return
+    cache = _table_cache()
+    cache[version_id] = table
+    cache.move_to_end(version_id)
+    while len(cache) > _TABLE_CACHE_ENTRIES:
+        cache.popitem(last=False)
 
-def head_version(client, layout: S3Layout) -> Optional[str]:
+
+def _table_to_frame(table: pa.Table, columns: Optional[list] = None) -> pd.DataFrame:
+    # Arrow -> pandas is the expensive conversion; restrict it to the columns
+    # the grid will actually edit. The full Arrow table stays authoritative.
+    if columns:
+        selected = [name for name in columns if name in table.column_names]
+        if selected:
+            table = table.select(selected)
+    return table.to_pandas(use_threads=True, split_blocks=True)
+
+
+def load_dataset(client, layout: S3Layout, columns: Optional[list] = None):
+    # A cheap head_object tells us whether the master changed; if the version is
+    # unchanged the GET + parse is served from the cache instead of S3. The
+    # ETag rides along so saves can use a conditional PUT.
+    version_id, etag = head_master(client, layout)
+    cache = _table_cache()
+    if version_id and version_id in cache:
+        table = cache[version_id]
+        cache.move_to_end(version_id)
+    elif version_id is None:
+        # Unversioned bucket (or head failed): caching by version would go stale.
+        table = _get_table(client, layout.bucket, layout.master_key, None)
+    else:
+        table = _fetch_table(client, layout.bucket, layout.master_key, version_id, layout.file_format)
+        _remember_table(version_id, table)
+    return _table_to_frame(table, columns), version_id, etag, table
+
+
+def head_master(client, layout: S3Layout) -> tuple[Optional[str], Optional[str]]:
     try:
         head = client.head_object(Bucket=layout.bucket, Key=layout.master_key)
-        return head.get("VersionId")
+        return head.get("VersionId"), head.get("ETag")
     except ClientError:
+        return None, None
+
+
+def _json_value(value):
+    if pd.isna(value):
         return None
+    return value.item() if isinstance(value, np.generic) else value
 
 
-def save_dataset(client, layout: S3Layout, df: pd.DataFrame, expected_version: Optional[str], user_note: str):
-    _validate_dataset(df)
-    current_version = head_version(client, layout)
-    if expected_version and current_version and current_version != expected_version:
-        raise RuntimeError("Master file changed in S3 since you loaded it. Reload before saving.")
+def _compute_changes(before: Optional[pd.DataFrame], after: pd.DataFrame) -> Optional[list]:
+    # Cell-level diff of the edited view; None means the shapes diverged and a
+    # cell diff is not meaningful (e.g. after a reload mid-edit).
+    if before is None or before.shape != after.shape or list(before.columns) != list(after.columns):
+        return None
+    neq = before.values != after.values
+    # Masked dtypes (e.g. Int64 after the grid clears a numeric cell) compare
+    # value-vs-NA to pd.NA under Kleene logic, which np.where cannot digest;
+    # treat those as changed, then drop cells that are NA on both sides.
+    neq = np.where(pd.isna(neq), True, neq).astype(bool)
+    mask = neq & ~(pd.isna(before.values) & pd.isna(after.values))
+    rows, cols = np.where(mask)
+    return [
+        {
+            "row": int(r),
+            "col": str(before.columns[c]),
+            "old": _json_value(before.iat[r, c]),
+            "new": _json_value(after.iat[r, c]),
+        }
+        for r, c in zip(rows, cols)
+    ]
+
+
+def _merge_edited_columns(table: pa.Table, edited: pd.DataFrame) -> pa.Table:
+    # Swap only the edited columns into the authoritative Arrow table;
+    # untouched columns are carried over without a copy.
+    if len(edited.index) != table.num_rows:
+        raise RuntimeError(
+            f"Edited grid has {len(edited.index)} rows but the dataset has {table.num_rows}; reload before saving."
+        )
+    for name in edited.columns:
+        idx = table.schema.get_field_index(name)
+        if idx < 0:
+            continue
+        field = table.schema.field(idx)
+        array = pa.Array.from_pandas(edited[name])
+        try:
+            array = array.cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # Grid edits can legitimately widen a column's type (e.g. int -> str).
+            field = pa.field(name, array.type)
+        table = table.set_column(idx, field, array)
+    return table
+
+
+def save_dataset(client, layout: S3Layout, table: pa.Table, edited_df: pd.DataFrame, expected_version: Optional[str], user_note: str, changes: Optional[list] = None, expected_etag: Optional[str] = None):
+    table = _merge_edited_columns(table, edited_df)
+    _validate_table(table)
 
     buffer = io.BytesIO()
-    df.to_parquet(buffer, index=False)
+    # zstd + dictionary encoding roughly halves the bytes of every PUT/GET
+    # versus the pandas snappy defaults; 256k row groups with statistics keep
+    # the file friendly to future column/row-group pruning.
+    pq.write_table(
+        table,
+        buffer,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=True,
+        data_page_size=1 << 20,
+        row_group_size=262_144,
+        write_statistics=True,
+    )
     ext = "parquet"
     buffer.seek(0)
 
-    blob = buffer.getvalue()
-
+    # Conditional PUT: IfMatch folds the concurrent-overwrite check into the
+    # write itself, closing the head-then-put race window entirely. This
+    # requires a single put_object rather than a multipart upload, which is a
+    # fine trade at this dataset's size, and the response hands back the new
+    # VersionId and ETag without a follow-up head. The buffer goes in as a
+    # file object so the blob is not duplicated.
+    put_kwargs = {
+        "Bucket": layout.bucket,
+        "Key": layout.master_key,
+        "Body": buffer,
+        "ContentType": "application/octet-stream",
+    }
+    if expected_etag:
+        put_kwargs["IfMatch"] = expected_etag
     try:
-        put_resp = client.put_object(Bucket=layout.bucket, Key=layout.master_key, Body=blob)
-    except (BotoCoreError, ClientError) as exc:
+        put_resp = client.put_object(**put_kwargs)
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") == "PreconditionFailed":
+            raise RuntimeError("Master file changed in S3 since you loaded it. Reload before saving.")
+        raise RuntimeError(f"Failed to save master file: {exc}")
+    except BotoCoreError as exc:
         raise RuntimeError(f"Failed to save master file: {exc}")
 
-    new_version = put_resp.get("VersionId")
-    snapshot_key = build_snapshot_key(layout.snapshot_prefix, ext)
-    _write_snapshot(client, layout.bucket, snapshot_key, blob)
-    audit_key = build_audit_key(layout.audit_prefix)
-    _write_audit_entry(client, layout.bucket, audit_key, user_note, expected_version, new_version, snapshot_key, df)
+    # The serialized blob is dead weight once the PUT returns: the snapshot is
+    # a server-side copy and the audit entry never sees the bytes. Release it
+    # before the snapshot/audit tail rather than at function exit.
+    buffer.close()
+    del buffer
 
-    return new_version, snapshot_key, audit_key
+    new_version = put_resp.get("VersionId")
+    new_etag = put_resp.get("ETag")
+    # Seed the table cache so reloading the version we just wrote is a no-op.
+    _remember_table(new_version, table)
+    # A known-empty diff means the master bytes are unchanged; the audit line
+    # is still worth recording, but a snapshot of identical data is not.
+    snapshot_key = None if changes == [] else build_snapshot_key(layout.snapshot_prefix, ext)
+    # Snapshot and audit target independent keys; overlap them on the client's
+    # connection pool instead of paying both latencies back to back.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        snapshot_future = None
+        if snapshot_key:
+            snapshot_future = pool.submit(
+                _copy_snapshot, client, layout.bucket, layout.master_key, new_version, snapshot_key
+            )
+        audit_future = pool.submit(
+            _write_audit_entry,
+            client,
+            layout.bucket,
+            layout.audit_prefix,
+            user_note,
+            expected_version,
+            new_version,
+            snapshot_key,
+            table,
+            changes,
+        )
+        if snapshot_future is not None:
+            snapshot_future.result()
+        audit_key = audit_future.result()
+
+    return new_version, new_etag, snapshot_key, audit_key, table
+
+
+def _copy_snapshot(client, bucket: str, master_key: str, master_version_id: Optional[str], key: str):
+    # Server-side copy: S3 duplicates the just-uploaded master internally, so
+    # the snapshot costs no outbound bandwidth. Pinning VersionId keeps a
+    # concurrent overwrite from being snapshotted instead. copy_object handles
+    # objects up to 5 GB, far beyond this dataset.
+    source = {"Bucket": bucket, "Key": master_key}
+    if master_version_id:
+        source["VersionId"] = master_version_id
+    try:
+        client.copy_object(CopySource=source, Bucket=bucket, Key=key, MetadataDirective="COPY")
+    except (BotoCoreError, ClientError) as exc:
+        raise RuntimeError(f"Failed to write snapshot {key}: {exc}")
 
 
-def _write_snapshot(client, bucket: str, key: str, payload: bytes):
+# Flush queued audit lines once either threshold is hit; one tiny PUT per save
+# would otherwise dominate the audit trail's request count and listing cost.
+_AUDIT_FLUSH_ENTRIES = 32
+_AUDIT_FLUSH_SECONDS = 10.0
+
+
+@st.cache_resource(show_spinner=False)
+def _audit_buffer():
+    return {"entries": [], "lock": threading.Lock(), "last_flush": time.monotonic()}
+
+
+def _flush_audit_buffer(client, bucket: str, prefix: str, force: bool = False) -> Optional[str]:
+    # Flush when a threshold is hit (or force=True); returns the written key,
+    # or None when nothing was due. A failed PUT re-queues the popped lines so
+    # audit records are never dropped on a transient error.
+    buffer = _audit_buffer()
+    with buffer["lock"]:
+        if not buffer["entries"]:
+            return None
+        overdue = time.monotonic() - buffer["last_flush"] >= _AUDIT_FLUSH_SECONDS
+        if not force and len(buffer["entries"]) < _AUDIT_FLUSH_ENTRIES and not overdue:
+            return None
+        lines, buffer["entries"] = buffer["entries"], []
+        buffer["last_flush"] = time.monotonic()
+    key = build_audit_key(prefix)
+    payload = ("\n".join(lines) + "\n").encode()
     try:
-        client.put_object(Bucket=bucket, Key=key, Body=payload)
+        client.put_object(Bucket=bucket, Key=key, Body=payload, ContentType="application/jsonl")
     except (BotoCoreError, ClientError) as exc:
-        raise RuntimeError(f"Failed to write snapshot {key}: {exc}")
+        with buffer["lock"]:
+            buffer["entries"][:0] = lines
+        raise RuntimeError(f"Failed to write audit log {key}: {exc}")
+    return key
 
 
-def _write_audit_entry(client, bucket: str, key: str, note: str, prev_version: Optional[str], new_version: Optional[str], snapshot_key: str, df: pd.DataFrame):
+def _write_audit_entry(client, bucket: str, prefix: str, note: str, prev_version: Optional[str], new_version: Optional[str], snapshot_key: Optional[str], table: pa.Table, changes: Optional[list] = None) -> Optional[str]:
     ts = datetime.now(timezone.utc).isoformat()
     user = os.environ.get("USER") or os.environ.get("USERNAME") or "unknown"
     entry = {
@@ -107,50 +361,143 @@ def _write_audit_entry(client, bucket: str, key: str, note: str, prev_version: O
         "prev_version": prev_version,
         "new_version": new_version,
         "snapshot_key": snapshot_key,
-        "row_count": len(df.index),
-        "column_count": len(df.columns),
+        "row_count": table.num_rows,
+        "column_count": table.num_columns,
+        # Cell-level diff of the edit (null when the shape changed and a cell
+        # diff was not meaningful); makes history reconstructable without
+        # diffing full snapshots.
+        "changes": changes,
     }
-    payload = (json.dumps(entry) + "\n").encode()
-    try:
-        client.put_object(Bucket=bucket, Key=key, Body=payload, ContentType="application/jsonl")
-    except (BotoCoreError, ClientError) as exc:
-        raise RuntimeError(f"Failed to write audit log {key}: {exc}")
+    buffer = _audit_buffer()
+    with buffer["lock"]:
+        buffer["entries"].append(json.dumps(entry, default=str))
+    return _flush_audit_buffer(client, bucket, prefix)
+
+
+def _validate_table(table: pa.Table):
+    if table.num_rows == 0:
+        raise ValueError("Dataset is empty; nothing to edit.")
+    if {"tow", "net"}.issubset(table.column_names):
+        # Only the two key columns cross into pandas for the duplicate check.
+        _validate_dataset(table.select(["tow", "net"]).to_pandas())
 
 
 def _validate_dataset(df: pd.DataFrame):
     if df.empty:
         raise ValueError("Dataset is empty; nothing to edit.")
-    if {"tow", "net"}.issubset(df.columns):
+    if not {"tow", "net"}.issubset(df.columns):
+        return
+    if len(df.index) < 10_000:
         dupes = df[["tow", "net"]].duplicated().sum()
-        if dupes:
-            raise ValueError(f"Dataset has {dupes} duplicate tow+net combinations; resolve before editing.")
+    else:
+        # duplicated() on two object columns hashes a Python tuple per row.
+        # Factorize each column to integer codes, fold them into one int64 key,
+        # and count collisions with np.unique -- no per-row Python objects.
+        tow_codes, _ = pd.factorize(df["tow"], sort=False)
+        net_codes, net_uniques = pd.factorize(df["net"], sort=False)
+        combined = tow_codes.astype(np.int64) * (len(net_uniques) + 1) + net_codes
+        dupes = combined.size - np.unique(combined).size
+    if dupes:
+        raise ValueError(f"Dataset has {dupes} duplicate tow+net combinations; resolve before editing.")
+
+
+def _now_parts() -> tuple[str, str, str]:
+    # One clock read, one strftime, one uuid per key; the day is sliced out of
+    # the compact stamp instead of a second format pass.
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    day = f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]}"
+    return stamp, day, uuid.uuid4().hex
 
 
 def build_snapshot_key(prefix: str, ext: str) -> str:
-    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
-    return f"{prefix.rstrip('/')}/master_{ts}_{uuid.uuid4().hex}.{ext}"
+    stamp, _, uid = _now_parts()
+    return f"{prefix.rstrip('/')}/master_{stamp}_{uid}.{ext}"
 
 
 def build_audit_key(prefix: str) -> str:
-    ts = datetime.now(timezone.utc)
-    day = ts.strftime("%Y-%m-%d")
-    stamp = ts.strftime("%Y%m%dT%H%M%S")
-    return f"{prefix.rstrip('/')}/{day}/user_{stamp}_{uuid.uuid4().hex}.jsonl"
+    stamp, day, uid = _now_parts()
+    return f"{prefix.rstrip('/')}/{day}/user_{stamp}_{uid}.jsonl"
 
 
-def render_grid(df: pd.DataFrame) -> pd.DataFrame:
+def _frame_digest(df: pd.DataFrame) -> bytes:
+    # C-level row hashes instead of Streamlit's default pickle walk; this is
+    # what makes caching on a whole DataFrame cheap enough to be worth it.
+    # The row hashes cover only cell values, but the grid options also depend
+    # on column names and dtypes, so fold the schema into the digest.
+    schema = str(list(df.dtypes.items())).encode()
+    return schema + pd.util.hash_pandas_object(df, index=False).values.tobytes()
+
+
+@st.cache_data(max_entries=8, show_spinner=False, hash_funcs={pd.DataFrame: _frame_digest})
+def _grid_options(df: pd.DataFrame) -> dict:
     gb = GridOptionsBuilder.from_dataframe(df)
     gb.configure_default_column(editable=True, filter=True, resizable=True)
     gb.configure_grid_options(domLayout="normal")
+    return gb.build()
+
+
+def _grid_field(grid, name: str):
+    try:
+        return grid[name]
+    except (KeyError, TypeError):
+        return getattr(grid, name, None)
+
+
+def _event_delta(grid, df: pd.DataFrame) -> Optional[tuple]:
+    """Map a cellValueChanged event back to (row, column, value).
+
+    Returns None whenever the edit cannot be placed with certainty:
+    event rowIndex is the grid's *display* position, so any active sort or
+    filter -- or grid state we cannot read at all -- disqualifies the fast
+    path and the caller must rebuild from the full grid data instead.
+    """
+    event = _grid_field(grid, "event_data")
+    if not isinstance(event, dict):
+        return None
+    columns_state = _grid_field(grid, "columns_state")
+    if columns_state is None:
+        columns_state = _grid_field(grid, "column_state")
+    if not isinstance(columns_state, list) or any(
+        isinstance(state, dict) and state.get("sort") for state in columns_state
+    ):
+        return None
+    grid_state = _grid_field(grid, "grid_state")
+    if not isinstance(grid_state, dict) or (grid_state.get("filter") or {}).get("filterModel"):
+        return None
+    column = event.get("column") or event.get("colId")
+    if isinstance(column, dict):
+        # Newer streamlit-aggrid serializes the column object, not a bare colId.
+        column = column.get("colId")
+    row = event.get("rowIndex")
+    if row is None or not isinstance(column, str) or column not in df.columns:
+        return None
+    return int(row), column, event.get("newValue")
+
+
+def render_grid(df: pd.DataFrame) -> pd.DataFrame:
     grid = AgGrid(
         df,
-        gridOptions=gb.build(),
+        gridOptions=_grid_options(df),
         update_on=["cellValueChanged"],  # replaces deprecated GridUpdateMode
         fit_columns_on_grid_load=True,
         enable_enterprise_modules=False,
     )
-    edited = grid["data"]
-    return pd.DataFrame(edited)
+    # Prefer the cellValueChanged event payload: applying one scalar is far
+    # cheaper than rebuilding the frame from the grid's serialized data on
+    # every keystroke. Deltas accumulate on the session frame itself (the
+    # pristine baseline keeps the audit diff honest), and each event is
+    # consumed exactly once: the component re-delivers the last eventData on
+    # every rerun, so replaying it would resurrect edits after a reload and a
+    # fresh delta starting from a copy would drop all earlier unsaved edits.
+    delta = _event_delta(grid, df)
+    if delta is not None:
+        event = _grid_field(grid, "event_data")
+        if event != st.session_state.get("applied_grid_event"):
+            row, column, value = delta
+            df.iat[row, df.columns.get_loc(column)] = value
+            st.session_state["applied_grid_event"] = event
+        return df
+    return pd.DataFrame(_grid_field(grid, "data"))
 
 
 def sidebar_config() -> S3Layout:
@@ -177,13 +524,35 @@ def streamlit_app():
         st.error(str(exc))
         st.stop()
 
+    # Drain any overdue audit lines left from a burst of saves; without this
+    # the tail of the buffer would only flush when the next save arrives.
+    try:
+        _flush_audit_buffer(client, layout.bucket, layout.audit_prefix)
+    except RuntimeError as exc:
+        st.sidebar.warning(f"Audit flush failed; entries kept queued. {exc}")
+
+    # Options appear after the first load; restricting the selection keeps the
+    # Arrow -> pandas conversion and the grid payload proportional to the
+    # columns actually being edited.
+    all_columns = st.session_state.get("all_columns", [])
+    selected_cols = None
+    if all_columns:
+        selected_cols = st.sidebar.multiselect("Columns to edit", options=all_columns, default=all_columns)
+        st.sidebar.caption("Changing the selection re-projects from the loaded data and discards unsaved edits.")
+
     load_col, save_col = st.columns([1, 1])
     with load_col:
         if st.button("Reload from S3", type="primary") or "dataset" not in st.session_state:
             try:
-                df, version_id = load_dataset(client, layout)
+                df, version_id, etag, table = load_dataset(client, layout, selected_cols)
                 st.session_state["dataset"] = df
+                # Pristine copy for diffing; nothing downstream may alias it.
+                st.session_state["baseline"] = df.copy()
                 st.session_state["version_id"] = version_id
+                st.session_state["etag"] = etag
+                st.session_state["table"] = table
+                st.session_state["all_columns"] = list(table.column_names)
+                st.session_state["projected_cols"] = list(selected_cols or table.column_names)
                 st.success(f"Loaded {len(df)} rows (version {version_id}).")
             except Exception as exc:
                 st.error(exc)
@@ -193,6 +562,11 @@ def streamlit_app():
         st.info("Load data to begin editing.")
         st.stop()
 
+    if selected_cols and st.session_state.get("projected_cols") != list(selected_cols):
+        st.session_state["dataset"] = _table_to_frame(st.session_state["table"], selected_cols)
+        st.session_state["baseline"] = st.session_state["dataset"].copy()
+        st.session_state["projected_cols"] = list(selected_cols)
+
     df = st.session_state["dataset"]
     st.caption("Edit cells directly; tow+net should stay unique.")
     edited_df = render_grid(df)
@@ -202,13 +576,29 @@ def streamlit_app():
     with save_col:
         if st.button("Save to S3", type="secondary"):
             try:
-                new_version, snapshot_key, audit_key = save_dataset(
-                    client, layout, edited_df, st.session_state.get("version_id"), note
+                # Diff against the pristine baseline, never the working frame:
+                # render_grid may hand back (a view of) the working frame, and a
+                # self-comparison would report an empty diff for real edits.
+                changes = _compute_changes(st.session_state.get("baseline"), edited_df)
+                new_version, new_etag, snapshot_key, audit_key, merged_table = save_dataset(
+                    client,
+                    layout,
+                    st.session_state["table"],
+                    edited_df,
+                    st.session_state.get("version_id"),
+                    note,
+                    changes=changes,
+                    expected_etag=st.session_state.get("etag"),
                 )
                 st.session_state["dataset"] = edited_df
+                st.session_state["baseline"] = edited_df.copy()
                 st.session_state["version_id"] = new_version
+                st.session_state["etag"] = new_etag
+                st.session_state["table"] = merged_table
+                audit_note = f"audit {audit_key}" if audit_key else "audit queued"
+                snapshot_note = f"snapshot {snapshot_key}" if snapshot_key else "no snapshot (no cell changes)"
                 st.success(
-                    f"Saved. New version {new_version}; snapshot {snapshot_key}; audit {audit_key}."
+                    f"Saved. New version {new_version}; {snapshot_note}; {audit_note}."
                 )
             except Exception as exc:
                 st.error(exc)
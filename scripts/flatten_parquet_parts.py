@@ -1,10 +1,13 @@
 import argparse
 import io
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import boto3
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from botocore.config import Config
 
 
 def parse_args() -> argparse.Namespace:
@@ -26,40 +29,111 @@ def parse_args() -> argparse.Namespace:
         "--profile",
         help="Optional AWS profile (falls back to default profile/credentials)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Number of parallel part downloads (default 16)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["arrow", "concat"],
+        default="arrow",
+        help="arrow streams row groups via pyarrow (default); concat unifies drifting schemas",
+    )
     return parser.parse_args()
 
 
 def get_s3_client(profile: str | None):
     session = boto3.Session(profile_name=profile) if profile else boto3.Session()
-    return session.client("s3")
+    # Pool size must cover the download concurrency or threads serialize on HTTP.
+    return session.client("s3", config=Config(max_pool_connections=32))
 
 
 def list_parquet_parts(client, bucket: str, prefix: str) -> List[str]:
-    # Single listing is fine for this dataset size. Extend to pagination if needed.
-    resp = client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-    contents = resp.get("Contents", [])
-    # Athena CTAS sometimes writes objects without a .parquet suffix. Include any
-    # non-directory object under the prefix that is not a marker like _SUCCESS.
-    return [
-        obj["Key"]
-        for obj in contents
-        if not obj["Key"].endswith("/") and "_SUCCESS" not in obj["Key"]
+    # Paginate so CTAS outputs beyond the 1000-key page cap are not silently
+    # truncated. Athena sometimes writes objects without a .parquet suffix, so
+    # include any non-empty, non-directory object that is not a marker like
+    # _SUCCESS. Largest parts first keeps the download pool busy end to end.
+    paginator = client.get_paginator("list_objects_v2")
+    pages = paginator.paginate(Bucket=bucket, Prefix=prefix, PaginationConfig={"PageSize": 1000})
+    parts = [
+        (obj["Key"], obj["Size"])
+        for page in pages
+        for obj in page.get("Contents", [])
+        if not obj["Key"].endswith("/") and "_SUCCESS" not in obj["Key"] and obj["Size"] > 0
     ]
+    parts.sort(key=lambda item: item[1], reverse=True)
+    return [key for key, _ in parts]
+
+
+def _fetch_part_bytes(client, bucket: str, key: str) -> bytes:
+    return client.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+
+def _flatten_arrow(client, bucket: str, keys: List[str], output_key: str, concurrency: int):
+    # Decode each part as an Arrow table and stream it straight into a
+    # ParquetWriter; rows never round-trip through pandas and only one part
+    # is materialized at a time on the write side.
+    buf = io.BytesIO()
+    writer = None
+    rows = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_fetch_part_bytes, client, bucket, key) for key in keys]
+        for future in futures:
+            table = pq.read_table(pa.BufferReader(pa.py_buffer(future.result())))
+            if writer is None:
+                writer = pq.ParquetWriter(buf, table.schema, compression="zstd")
+            writer.write_table(table)
+            rows += table.num_rows
+    if writer is None:
+        raise SystemExit("No Parquet parts found to flatten.")
+    writer.close()
+    buf.seek(0)
+    # upload_fileobj streams multipart chunks from the buffer; getvalue()
+    # would copy the entire output a second time.
+    client.upload_fileobj(buf, bucket, output_key)
+    print(f"Wrote {output_key} from {len(keys)} part file(s); rows={rows}")
 
 
-def flatten_parts(client, bucket: str, keys: List[str], output_key: str):
-    frames = []
-    for key in keys:
-        body = client.get_object(Bucket=bucket, Key=key)["Body"].read()
-        frames.append(pd.read_parquet(io.BytesIO(body)))
-    if not frames:
+def _flatten_concat(client, bucket: str, keys: List[str], output_key: str, concurrency: int):
+    # concat_tables chains same-schema Arrow chunks without copying and
+    # promote_options unifies schemas that drift across CTAS parts; useful when
+    # the parts disagree and the streaming engine's fixed schema won't do.
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(
+                lambda k: pq.read_table(
+                    pa.BufferReader(pa.py_buffer(_fetch_part_bytes(client, bucket, k)))
+                ),
+                key,
+            )
+            for key in keys
+        ]
+        tables = [future.result() for future in futures]
+    if not tables:
         raise SystemExit("No Parquet parts found to flatten.")
-    combined = pd.concat(frames, ignore_index=True)
+    combined = pa.concat_tables(tables, promote_options="default")
     buf = io.BytesIO()
-    combined.to_parquet(buf, index=False)
+    pq.write_table(combined, buf, compression="zstd")
     buf.seek(0)
-    client.put_object(Bucket=bucket, Key=output_key, Body=buf.getvalue())
-    print(f"Wrote {output_key} from {len(keys)} part file(s); rows={len(combined.index)}")
+    client.upload_fileobj(buf, bucket, output_key)
+    print(f"Wrote {output_key} from {len(keys)} part file(s); rows={combined.num_rows}")
+
+
+def flatten_parts(
+    client,
+    bucket: str,
+    keys: List[str],
+    output_key: str,
+    concurrency: int = 16,
+    engine: str = "arrow",
+):
+    # S3 single-stream GETs leave bandwidth on the table; fetch parts in parallel.
+    if engine == "concat":
+        _flatten_concat(client, bucket, keys, output_key, concurrency)
+    else:
+        _flatten_arrow(client, bucket, keys, output_key, concurrency)
 
 
 def main():
@@ -68,7 +142,14 @@ def main():
     keys = list_parquet_parts(client, args.bucket, args.prefix)
     if not keys:
         raise SystemExit(f"No .parquet parts found under {args.prefix}")
-    flatten_parts(client, args.bucket, keys, args.output_key)
+    flatten_parts(
+        client,
+        args.bucket,
+        keys,
+        args.output_key,
+        concurrency=args.concurrency,
+        engine=args.engine,
+    )
 
 
 if __name__ == "__main__":